@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import copy
 import json
 import sys
 from pathlib import Path
@@ -12,10 +11,14 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
 from reaper_py.gemini_agent import GeminiAgentError, GeminiNotConfiguredError, plan_tool_calls
+from reaper_py.jsonio import dumps, loads
 from reaper_py.preview import render_preview_text
 from reaper_py.validate import suggestion_for_error, validate_tool_plan
 
 
+_TARGET_ALIASES = {"clip": "clips", "clips": "clips", "track": "tracks", "tracks": "tracks"}
+
+
 def _response(
     *,
     ok: bool,
@@ -35,8 +38,8 @@ def _response(
     }
 
 
-def _safe_json_load(text: str) -> dict[str, Any]:
-    payload = json.loads(text)
+def _safe_json_load(raw: bytes) -> dict[str, Any]:
+    payload = loads(raw)
     if not isinstance(payload, dict):
         raise ValueError("Input JSON must be an object.")
     return payload
@@ -45,12 +48,7 @@ def _safe_json_load(text: str) -> dict[str, Any]:
 def _normalize_target(value: Any) -> str | None:
     if not isinstance(value, str):
         return None
-    v = value.strip().lower()
-    if v in {"clip", "clips"}:
-        return "clips"
-    if v in {"track", "tracks"}:
-        return "tracks"
-    return None
+    return _TARGET_ALIASES.get(value.strip().lower())
 
 
 def _normalize_conversation_hint(value: Any) -> dict[str, str] | None:
@@ -74,21 +72,17 @@ def _target_error(target: str) -> str:
 
 
 def _is_target_selection_error(error: str, target: str) -> bool:
-    lowered = error.lower()
-    if target == "tracks":
-        return "selected track" in lowered
-    return "selected clip" in lowered
+    phrase = "selected track" if target == "tracks" else "selected clip"
+    return phrase in error.lower()
 
 
 def _is_target_clarification(question: str) -> bool:
     lowered = question.lower()
-    has_clips = "clip" in lowered
-    has_tracks = "track" in lowered
-    return has_clips and has_tracks
+    return "clip" in lowered and "track" in lowered
 
 
 def _ctx_for_target(ctx: dict[str, Any], forced_target: str | None) -> dict[str, Any]:
-    planning_ctx = copy.deepcopy(ctx)
+    planning_ctx = dict(ctx)
     if forced_target == "tracks":
         planning_ctx["selected_items"] = []
     elif forced_target == "clips":
@@ -106,6 +100,14 @@ def _cmd_for_target(command: str, forced_target: str | None) -> str:
     return command
 
 
+def planning_error_response(exc: Exception) -> dict[str, Any]:
+    if isinstance(exc, GeminiNotConfiguredError):
+        return _response(ok=False, error=str(exc))
+    if isinstance(exc, GeminiAgentError):
+        return _response(ok=False, error=f"Gemini planning error: {exc}")
+    return _response(ok=False, error=f"Unexpected planning error: {exc}")
+
+
 def process_payload(payload: dict[str, Any]) -> dict[str, Any]:
     command = payload.get("cmd")
     ctx = payload.get("ctx")
@@ -121,19 +123,17 @@ def process_payload(payload: dict[str, Any]) -> dict[str, Any]:
         forced_target = clarification_answer
     conversation_hint = _normalize_conversation_hint(payload.get("conversation_hint"))
 
-    planning_ctx = _ctx_for_target(ctx, forced_target)
+    planning_ctx = ctx
+    if forced_target is not None or conversation_hint:
+        planning_ctx = _ctx_for_target(ctx, forced_target)
     if conversation_hint:
         planning_ctx["conversation_hint"] = conversation_hint
     planning_cmd = _cmd_for_target(command.strip(), forced_target)
 
     try:
         plan = plan_tool_calls(planning_cmd, planning_ctx)
-    except GeminiNotConfiguredError as exc:
-        return _response(ok=False, error=str(exc))
-    except GeminiAgentError as exc:
-        return _response(ok=False, error=f"Gemini planning error: {exc}")
     except Exception as exc:  # guardrail: always return JSON
-        return _response(ok=False, error=f"Unexpected planning error: {exc}")
+        return planning_error_response(exc)
 
     if plan["needs_clarification"]:
         if forced_target is not None:
@@ -177,27 +177,45 @@ def process_payload(payload: dict[str, Any]) -> dict[str, Any]:
 
 def _read_input(path: str | None) -> dict[str, Any]:
     if path:
-        return _safe_json_load(Path(path).read_text(encoding="utf-8"))
-    return _safe_json_load(sys.stdin.read())
+        return _safe_json_load(Path(path).read_bytes())
+    return _safe_json_load(sys.stdin.buffer.read())
 
 
 def _write_output(data: dict[str, Any], path: str | None) -> None:
-    serialized = json.dumps(data, ensure_ascii=False)
+    serialized = dumps(data)
     if path:
-        Path(path).write_text(serialized, encoding="utf-8")
+        Path(path).write_bytes(serialized)
         return
-    sys.stdout.write(serialized)
+    stdout = sys.stdout.buffer
+    stdout.write(serialized + b"\n")
+    stdout.flush()
+
+
+def serve() -> int:
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        try:
+            response = process_payload(_safe_json_load(line))
+        except json.JSONDecodeError as exc:
+            response = _response(ok=False, error=f"Invalid JSON input: {exc}")
+        except Exception as exc:  # guardrail: always return JSON
+            response = _response(ok=False, error=f"Bridge failure: {exc}")
+        _write_output(response, None)
+    return 0
 
 
 def main() -> int:
     input_path = None
     output_path = None
 
+    if sys.argv[1:] == ["--serve"]:
+        return serve()
     if len(sys.argv) == 3:
         input_path = sys.argv[1]
         output_path = sys.argv[2]
     elif len(sys.argv) != 1:
-        fallback = _response(ok=False, error="Usage: python3 -m reaper_py.bridge <input.json> <output.json>")
+        fallback = _response(ok=False, error="Usage: python3 -m reaper_py.bridge [<input.json> <output.json> | --serve]")
         _write_output(fallback, None)
         return 1
 
@@ -215,7 +233,7 @@ def main() -> int:
         _write_output(response, output_path)
     except Exception:
         if output_path:
-            sys.stdout.write(json.dumps(_response(ok=False, error="Bridge failed to write output.")))
+            _write_output(_response(ok=False, error="Bridge failed to write output."), None)
             return 1
         return 1
     return 0 if response.get("ok") else 1
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import functools
 import importlib
+import io
 import json
 import os
+import time
 from pathlib import Path
+from typing import IO, BinaryIO
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
 except ImportError:  # pragma: no cover - dependency guard
     requests = None
 
+from reaper_py.jsonio import loads
+
 
 def _load_dotenv_if_available() -> None:
     try:
@@ -32,6 +39,32 @@ class ElevenLabsError(RuntimeError):
     pass
 
 
+@functools.lru_cache(maxsize=1)
+def _session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("https://", adapter)
+    return session
+
+
+# (connect, read); the read timeout bounds each wait for data, not the whole request.
+_HTTP_TIMEOUT = (3.05, 15)
+# cursor_panel.lua kills TTS after 30 s. Requests start before this deadline with timeouts
+# capped to the time left, which leaves room for one stalled read inside that budget.
+_TTS_DEADLINE_SECONDS = 14.0
+_AUDIO_CHUNK_SIZE = 64 * 1024
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+
+_VOICE_CACHE: dict[str, str] = {}
+
+_PUNCTUATION = frozenset({".", ",", "!", "?", ";", ":"})
+_TEXT_VALUE_KEYS = ("text", "word", "token", "value", "content", "transcript")
+_WORD_TEXT_KEYS = ("text", "word", "token", "value", "content")
+_TRANSCRIPT_KEYS = ("text", "transcript", "transcription", "normalized_text", "raw_text", "utterance")
+_NESTED_TRANSCRIPT_KEYS = ("data", "result", "output")
+
+
+@functools.lru_cache(maxsize=1)
 def _require_api_key() -> str:
     api_key = os.getenv("ELEVENLABS_API_KEY", "").strip()
     if not api_key:
@@ -39,19 +72,32 @@ def _require_api_key() -> str:
     return api_key
 
 
-def _discover_default_voice_id(api_key: str) -> str | None:
+def _reset_credentials_cache() -> None:
+    _require_api_key.cache_clear()
+    _VOICE_CACHE.clear()
+
+
+def _timeout_until(deadline: float) -> tuple[float, float]:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise ElevenLabsError(f"TTS timed out after {_TTS_DEADLINE_SECONDS:g}s.")
+    connect_timeout, read_timeout = _HTTP_TIMEOUT
+    return min(connect_timeout, remaining), min(read_timeout, remaining)
+
+
+def _discover_default_voice_id(api_key: str, timeout: tuple[float, float] = _HTTP_TIMEOUT) -> str | None:
     if requests is None:
         return None
     url = "https://api.elevenlabs.io/v1/voices"
     headers = {"xi-api-key": api_key}
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        response = _session().get(url, headers=headers, timeout=timeout)
     except requests.RequestException:
         return None
     if response.status_code >= 400:
         return None
     try:
-        payload = response.json()
+        payload = loads(response.content)
     except Exception:
         return None
     if not isinstance(payload, dict):
@@ -68,23 +114,35 @@ def _discover_default_voice_id(api_key: str) -> str | None:
     return None
 
 
-def _require_voice_id(voice_id: str | None, api_key: str) -> str:
+def _require_voice_id(voice_id: str | None, api_key: str, deadline: float | None = None) -> str:
     value = (voice_id or os.getenv("ELEVENLABS_VOICE_ID", "")).strip()
     if value:
         return value
 
-    discovered = _discover_default_voice_id(api_key)
+    cached = _VOICE_CACHE.get(api_key)
+    if cached:
+        return cached
+
+    timeout = _HTTP_TIMEOUT if deadline is None else _timeout_until(deadline)
+    discovered = _discover_default_voice_id(api_key, timeout)
     if discovered:
+        _VOICE_CACHE[api_key] = discovered
         return discovered
 
     raise ElevenLabsError("Missing ELEVENLABS_VOICE_ID and failed to discover a default ElevenLabs voice.")
 
 
 def _extract_error_text(response: requests.Response) -> str:
+    raw = response.content
     try:
-        payload = response.json()
+        payload = loads(raw)
     except Exception:
-        body = response.text.strip()
+        # Without a declared charset, assume UTF-8 rather than run response.text's detection.
+        try:
+            body = raw.decode(response.encoding or "utf-8", errors="replace")
+        except LookupError:
+            body = raw.decode("utf-8", errors="replace")
+        body = body.strip()
         return body[:200] if body else "unknown error"
 
     if isinstance(payload, dict):
@@ -99,37 +157,40 @@ def _extract_error_text(response: requests.Response) -> str:
 
 
 def _join_word_tokens(tokens: list[str]) -> str:
-    punctuation = {".", ",", "!", "?", ";", ":"}
-    pieces: list[str] = []
+    parts: list[str] = []
     for token in tokens:
         value = token.strip()
         if not value:
             continue
-        if pieces and value in punctuation:
-            pieces[-1] = pieces[-1] + value
-        else:
-            pieces.append(value)
-    return " ".join(pieces).strip()
+        if parts and value not in _PUNCTUATION:
+            parts.append(" ")
+        parts.append(value)
+    return "".join(parts)
 
 
 def _coerce_text(value: object) -> str | None:
-    if isinstance(value, str):
-        text = value.strip()
-        return text or None
-    if isinstance(value, list):
-        parts: list[str] = []
-        for item in value:
-            item_text = _coerce_text(item)
-            if item_text:
-                parts.append(item_text)
-        merged = " ".join(parts).strip()
-        return merged or None
-    if isinstance(value, dict):
-        for key in ("text", "word", "token", "value", "content", "transcript"):
-            nested = _coerce_text(value.get(key))
-            if nested:
-                return nested
-    return None
+    # Lists join every text part; dicts take the first text-like key that yields text.
+    # Dict frames carry the next key to try and the parts count on entry.
+    parts: list[str] = []
+    stack: list[tuple[object, int, int]] = [(value, -1, 0)]
+    while stack:
+        node, next_key, mark = stack.pop()
+        if isinstance(node, str):
+            text = node.strip()
+            if text:
+                parts.append(text)
+        elif isinstance(node, list):
+            stack.extend((item, -1, 0) for item in reversed(node))
+        elif isinstance(node, dict):
+            if next_key < 0:
+                next_key, mark = 0, len(parts)
+            elif len(parts) > mark:
+                continue
+            if next_key < len(_TEXT_VALUE_KEYS):
+                stack.append((node, next_key + 1, mark))
+                stack.append((node.get(_TEXT_VALUE_KEYS[next_key]), -1, 0))
+    merged = " ".join(parts)
+    return merged or None
 
 
 def _extract_text_from_words(words: object) -> str | None:
@@ -144,7 +205,7 @@ def _extract_text_from_words(words: object) -> str | None:
         if not isinstance(word, dict):
             continue
 
-        for key in ("text", "word", "token", "value", "content"):
+        for key in _WORD_TEXT_KEYS:
             value = _coerce_text(word.get(key))
             if value:
                 tokens.append(value)
@@ -171,15 +232,13 @@ def _extract_text_from_segments(segments: object) -> str | None:
 
 
 def _extract_transcript(payload: dict) -> str | None:
-    direct_keys = (
-        "text",
-        "transcript",
-        "transcription",
-        "normalized_text",
-        "raw_text",
-        "utterance",
-    )
-    for key in direct_keys:
+    text = payload.get("text")
+    if isinstance(text, str):
+        stripped = text.strip()
+        if stripped:
+            return stripped
+
+    for key in _TRANSCRIPT_KEYS:
         value = _coerce_text(payload.get(key))
         if value:
             return value
@@ -192,7 +251,7 @@ def _extract_transcript(payload: dict) -> str | None:
     if from_segments:
         return from_segments
 
-    for nested_key in ("data", "result", "output"):
+    for nested_key in _NESTED_TRANSCRIPT_KEYS:
         nested = payload.get(nested_key)
         if isinstance(nested, dict):
             nested_text = _extract_transcript(nested)
@@ -200,11 +259,73 @@ def _extract_transcript(payload: dict) -> str | None:
                 return nested_text
 
     # Final fallback: recursively search any nested text-like fields.
-    generic = _coerce_text(payload)
-    if generic:
-        return generic
-
-    return None
+    return _coerce_text(payload)
+
+
+class _MultipartFileUpload:
+    # multipart/form-data body (text fields + one file) with a known Content-Length.
+
+    def __init__(self, fields: dict[str, str], field_name: str, path: Path, content_type: str) -> None:
+        boundary = os.urandom(16).hex()
+        head = bytearray()
+        for name, value in fields.items():
+            head += f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        filename = path.name.replace('"', "%22")
+        head += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        tail = f"\r\n--{boundary}--\r\n".encode("ascii")
+
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self._path = path
+        self._head = bytes(head)
+        self._tail = tail
+        self._file: BinaryIO | None = None
+        self._size = 0
+        self._parts: list[BinaryIO] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(_UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def __enter__(self) -> _MultipartFileUpload:
+        self._file = self._path.open("rb")
+        file_size = os.fstat(self._file.fileno()).st_size
+        self._size = len(self._head) + file_size + len(self._tail)
+        self._parts = [io.BytesIO(self._head), self._file, io.BytesIO(self._tail)]
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            remaining = b"".join(part.read() for part in self._parts)
+            self._parts = []
+            return remaining
+
+        chunks: list[bytes] = []
+        while self._parts and size > 0:
+            chunk = self._parts[0].read(size)
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._parts = []
 
 
 def stt_transcribe(audio_path: str) -> str:
@@ -217,13 +338,12 @@ def stt_transcribe(audio_path: str) -> str:
         raise ElevenLabsError(f"Audio file not found: {audio_path}")
 
     url = "https://api.elevenlabs.io/v1/speech-to-text"
-    headers = {"xi-api-key": api_key}
-    data = {"model_id": os.getenv("ELEVENLABS_STT_MODEL", "scribe_v1")}
+    fields = {"model_id": os.getenv("ELEVENLABS_STT_MODEL", "scribe_v1")}
 
     try:
-        with path.open("rb") as audio_file:
-            files = {"file": (path.name, audio_file, "audio/wav")}
-            response = requests.post(url, headers=headers, data=data, files=files, timeout=15)
+        with _MultipartFileUpload(fields, "file", path, "audio/wav") as body:
+            headers = {"xi-api-key": api_key, "Content-Type": body.content_type}
+            response = _session().post(url, headers=headers, data=body, timeout=_HTTP_TIMEOUT)
     except requests.RequestException as exc:
         raise ElevenLabsError(f"STT request failed: {exc}") from exc
 
@@ -231,7 +351,7 @@ def stt_transcribe(audio_path: str) -> str:
         raise ElevenLabsError(f"STT HTTP {response.status_code}: {_extract_error_text(response)}")
 
     try:
-        payload = response.json()
+        payload = loads(response.content)
     except Exception as exc:
         raise ElevenLabsError("STT response was not valid JSON.") from exc
 
@@ -258,11 +378,18 @@ def stt_transcribe(audio_path: str) -> str:
 
 
 def tts_synthesize(text: str, voice_id: str | None = None) -> bytes:
+    buffer = io.BytesIO()
+    tts_synthesize_to(text, buffer, voice_id=voice_id)
+    return buffer.getvalue()
+
+
+def tts_synthesize_to(text: str, sink: IO[bytes], voice_id: str | None = None) -> int:
     if requests is None:
         raise ElevenLabsError("Missing dependency: requests. Install with: pip install -r requirements.txt")
 
+    deadline = time.monotonic() + _TTS_DEADLINE_SECONDS
     api_key = _require_api_key()
-    resolved_voice_id = _require_voice_id(voice_id, api_key)
+    resolved_voice_id = _require_voice_id(voice_id, api_key, deadline)
     spoken_text = text.strip()
     if not spoken_text:
         raise ElevenLabsError("TTS text is empty.")
@@ -280,14 +407,25 @@ def tts_synthesize(text: str, voice_id: str | None = None) -> bytes:
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=15)
+        response = _session().post(url, headers=headers, json=payload, timeout=_timeout_until(deadline), stream=True)
     except requests.RequestException as exc:
         raise ElevenLabsError(f"TTS request failed: {exc}") from exc
 
-    if response.status_code >= 400:
-        raise ElevenLabsError(f"TTS HTTP {response.status_code}: {_extract_error_text(response)}")
+    with response:
+        if response.status_code >= 400:
+            raise ElevenLabsError(f"TTS HTTP {response.status_code}: {_extract_error_text(response)}")
 
-    audio = response.content
-    if not audio:
+        written = 0
+        try:
+            for chunk in response.iter_content(chunk_size=_AUDIO_CHUNK_SIZE):
+                if chunk:
+                    sink.write(chunk)
+                    written += len(chunk)
+                if time.monotonic() > deadline:
+                    raise ElevenLabsError(f"TTS timed out after {_TTS_DEADLINE_SECONDS:g}s.")
+        except requests.RequestException as exc:
+            raise ElevenLabsError(f"TTS request failed: {exc}") from exc
+
+    if not written:
         raise ElevenLabsError("TTS response had empty audio content.")
-    return audio
+    return written
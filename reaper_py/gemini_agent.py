@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import functools
 import importlib
 import json
 import os
+import re
 import sys
-from typing import Any
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
 
 if sys.version_info >= (3, 10):
     from typing import TypeGuard
@@ -13,10 +18,12 @@ else:
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
 except ImportError:  # pragma: no cover - dependency guard
     requests = None
 
-from reaper_py.validate import WHITELISTED_TOOLS
+from reaper_py.jsonio import dumps, loads
+from reaper_py.validate import WHITELISTED_TOOLS, has_unambiguous_selection, validate_tool_plan
 
 
 def _load_dotenv_if_available() -> None:
@@ -36,6 +43,26 @@ def _load_dotenv_if_available() -> None:
 _load_dotenv_if_available()
 
 
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update({"Content-Type": "application/json"})
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("https://", adapter)
+    return session
+
+
+# requests does not document Session as thread-safe, so each thread (the caller's, and
+# every plan_tool_calls_batch worker) keeps its own pooled session.
+_THREAD_STATE = threading.local()
+
+
+def _session() -> requests.Session:
+    session = getattr(_THREAD_STATE, "session", None)
+    if session is None:
+        session = _THREAD_STATE.session = _build_session()
+    return session
+
+
 class GeminiAgentError(RuntimeError):
     pass
 
@@ -140,27 +167,32 @@ Argument constraints:
 """
 
 
-TOOL_ARG_KEYS: dict[str, set[str] | tuple[set[str], ...]] = {
-    "fade_out": {"seconds"},
-    "fade_in": {"seconds"},
-    "set_volume_delta": ({"db"}, {"percent"}),
-    "set_volume_set": {"percent"},
-    "set_pan": {"pan"},
-    "add_fx": {"type"},
-    "mute": set(),
-    "unmute": set(),
-    "solo": set(),
-    "unsolo": set(),
-    "crossfade": {"seconds"},
-    "cut_middle": {"seconds"},
-    "split_at_cursor": set(),
-    "duplicate": {"count"},
-    "trim_to_time_selection": set(),
+TOOL_ARG_KEYS: dict[str, frozenset[str] | tuple[frozenset[str], ...]] = {
+    "fade_out": frozenset({"seconds"}),
+    "fade_in": frozenset({"seconds"}),
+    "set_volume_delta": (frozenset({"db"}), frozenset({"percent"})),
+    "set_volume_set": frozenset({"percent"}),
+    "set_pan": frozenset({"pan"}),
+    "add_fx": frozenset({"type"}),
+    "mute": frozenset(),
+    "unmute": frozenset(),
+    "solo": frozenset(),
+    "unsolo": frozenset(),
+    "crossfade": frozenset({"seconds"}),
+    "cut_middle": frozenset({"seconds"}),
+    "split_at_cursor": frozenset(),
+    "duplicate": frozenset({"count"}),
+    "trim_to_time_selection": frozenset(),
+}
+
+_ALLOWED_ARG_KEYS: dict[str, tuple[frozenset[str], ...]] = {
+    name: keys if isinstance(keys, tuple) else (keys,) for name, keys in TOOL_ARG_KEYS.items()
 }
 
 
 def _is_number(value: Any) -> TypeGuard[int | float]:
-    return isinstance(value, (int, float)) and not isinstance(value, bool)
+    value_type = type(value)
+    return value_type is int or value_type is float
 
 
 def build_ctx_summary(ctx: dict[str, Any]) -> dict[str, Any]:
@@ -179,19 +211,19 @@ def build_ctx_summary(ctx: dict[str, Any]) -> dict[str, Any]:
         "time_selection": None,
     }
 
-    starts: list[float] = []
-    ends: list[float] = []
+    start_min: int | float | None = None
+    end_max: int | float | None = None
     for item in selected_items:
         if not isinstance(item, dict):
             continue
         start_raw = item.get("start")
         end_raw = item.get("end")
-        if _is_number(start_raw):
-            starts.append(float(start_raw))
-        if _is_number(end_raw):
-            ends.append(float(end_raw))
-    if starts and ends:
-        summary["selected_clips_range"] = {"start": min(starts), "end": max(ends)}
+        if _is_number(start_raw) and (start_min is None or start_raw < start_min):
+            start_min = start_raw
+        if _is_number(end_raw) and (end_max is None or end_raw > end_max):
+            end_max = end_raw
+    if start_min is not None and end_max is not None:
+        summary["selected_clips_range"] = {"start": float(start_min), "end": float(end_max)}
 
     time_selection = ctx.get("time_selection")
     if isinstance(time_selection, dict):
@@ -219,6 +251,18 @@ def build_ctx_summary(ctx: dict[str, Any]) -> dict[str, Any]:
     return summary
 
 
+def _strip_code_fences(text: str) -> str | None:
+    text = text.strip()
+    if not text.startswith("```"):
+        return None
+    lines = text.splitlines()
+    if lines and lines[0].startswith("```"):
+        lines = lines[1:]
+    if lines and lines[-1].strip() == "```":
+        lines = lines[:-1]
+    return "\n".join(lines).strip()
+
+
 def _extract_json_text(response_payload: dict[str, Any]) -> dict[str, Any]:
     candidates = response_payload.get("candidates")
     if not isinstance(candidates, list) or not candidates:
@@ -240,40 +284,34 @@ def _extract_json_text(response_payload: dict[str, Any]) -> dict[str, Any]:
     if not text_parts:
         raise GeminiAgentError("Gemini returned no text.")
 
-    text = "\n".join(text_parts).strip()
-    if text.startswith("```"):
-        lines = text.splitlines()
-        if lines and lines[0].startswith("```"):
-            lines = lines[1:]
-        if lines and lines[-1].strip() == "```":
-            lines = lines[:-1]
-        text = "\n".join(lines).strip()
+    text = text_parts[0] if len(text_parts) == 1 else "\n".join(text_parts)
 
     try:
-        parsed = json.loads(text)
+        parsed = loads(text)
     except json.JSONDecodeError as exc:
-        raise GeminiAgentError(f"Gemini returned invalid JSON: {exc}") from exc
+        unfenced = _strip_code_fences(text)
+        if unfenced is None:
+            raise GeminiAgentError(f"Gemini returned invalid JSON: {exc}") from exc
+        try:
+            parsed = loads(unfenced)
+        except json.JSONDecodeError as unfenced_exc:
+            raise GeminiAgentError(f"Gemini returned invalid JSON: {unfenced_exc}") from unfenced_exc
 
     if not isinstance(parsed, dict):
         raise GeminiAgentError("Gemini output must be an object.")
     return parsed
 
 
-def _allowed_arg_keys(name: str) -> tuple[set[str], ...]:
-    expected = TOOL_ARG_KEYS[name]
-    if isinstance(expected, tuple):
-        return expected
-    return (expected,)
+_REQUIRED_PLAN_KEYS = ("tool_calls", "needs_clarification", "clarification_question")
 
 
 def _enforce_schema(plan: dict[str, Any]) -> dict[str, Any]:
-    required_keys = {"tool_calls", "needs_clarification", "clarification_question"}
-    if set(plan.keys()) != required_keys:
+    if len(plan) != len(_REQUIRED_PLAN_KEYS) or not all(key in plan for key in _REQUIRED_PLAN_KEYS):
         raise GeminiAgentError("Gemini output keys are invalid.")
 
-    tool_calls = plan.get("tool_calls")
-    needs_clarification = plan.get("needs_clarification")
-    clarification_question = plan.get("clarification_question")
+    tool_calls = plan["tool_calls"]
+    needs_clarification = plan["needs_clarification"]
+    clarification_question = plan["clarification_question"]
 
     if not isinstance(tool_calls, list):
         raise GeminiAgentError("Gemini output: tool_calls must be a list.")
@@ -285,98 +323,233 @@ def _enforce_schema(plan: dict[str, Any]) -> dict[str, Any]:
             raise GeminiAgentError("Gemini output: clarification cannot include tool_calls.")
         if not isinstance(clarification_question, str) or not clarification_question.strip():
             raise GeminiAgentError("Gemini output: clarification_question must be non-empty.")
-        return {
-            "tool_calls": [],
-            "needs_clarification": True,
-            "clarification_question": clarification_question.strip(),
-        }
+        plan["clarification_question"] = clarification_question.strip()
+        return plan
 
     if clarification_question is not None:
         raise GeminiAgentError("Gemini output: clarification_question must be null when needs_clarification=false.")
     if not tool_calls:
         raise GeminiAgentError("Gemini output: tool_calls cannot be empty.")
 
-    normalized_calls = []
     for index, tool_call in enumerate(tool_calls):
         if not isinstance(tool_call, dict):
             raise GeminiAgentError(f"Gemini output: tool_call at index {index} is not an object.")
-        if set(tool_call.keys()) != {"name", "args"}:
+        if len(tool_call) != 2 or "name" not in tool_call or "args" not in tool_call:
             raise GeminiAgentError(f"Gemini output: tool_call at index {index} must contain only name and args.")
 
-        name = tool_call.get("name")
-        args = tool_call.get("args")
+        name = tool_call["name"]
+        args = tool_call["args"]
         if not isinstance(name, str) or name not in WHITELISTED_TOOLS:
             raise GeminiAgentError(f"Gemini output: unsupported tool {name!r}.")
         if not isinstance(args, dict):
             raise GeminiAgentError(f"Gemini output: args for {name} must be an object.")
 
-        valid_arg_sets = _allowed_arg_keys(name)
-        if set(args.keys()) not in valid_arg_sets:
+        valid_arg_sets = _ALLOWED_ARG_KEYS[name]
+        if frozenset(args) not in valid_arg_sets:
             readable = " or ".join(str(sorted(arg_set)) for arg_set in valid_arg_sets)
             raise GeminiAgentError(f"Gemini output: args for {name} must be {readable}.")
 
-        normalized_calls.append({"name": name, "args": args})
+    return plan
 
-    return {
-        "tool_calls": normalized_calls,
-        "needs_clarification": False,
-        "clarification_question": None,
-    }
+
+@functools.lru_cache(maxsize=1)
+def _gemini_url() -> str:
+    model = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+    return f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+
+
+_cached_api_key: str | None = None
+
+
+def _gemini_api_key() -> str | None:
+    # Only a non-empty key is cached, so a --serve worker sees a key set after it started.
+    global _cached_api_key
+    if not _cached_api_key:
+        _cached_api_key = os.getenv("GEMINI_API_KEY") or None
+    return _cached_api_key
 
 
-def _call_gemini(user_text: str, ctx_summary: dict[str, Any], api_key: str) -> dict[str, Any]:
+def refresh_config() -> None:
+    # Re-read GEMINI_MODEL / GEMINI_API_KEY on next use (they are cached after the first read).
+    global _cached_api_key
+    _gemini_url.cache_clear()
+    _cached_api_key = None
+
+
+# Everything before "contents"; each call appends its own contents and the closing brace.
+_STATIC_REQUEST_PREFIX = (
+    dumps(
+        {
+            "systemInstruction": {"parts": [{"text": SYSTEM_PROMPT}]},
+            "generationConfig": {"temperature": 0, "responseMimeType": "application/json"},
+        }
+    )[:-1]
+    + b',"contents":'
+)
+
+
+def _call_gemini(user_text: str, ctx_summary_json: str, api_key: str) -> dict[str, Any]:
     if requests is None:
         raise GeminiAgentError("Missing dependency: requests. Install with: pip install -r requirements.txt")
 
-    model = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
-
-    payload = {
-        "systemInstruction": {"parts": [{"text": SYSTEM_PROMPT}]},
-        "contents": [
-            {
-                "role": "user",
-                "parts": [
-                    {
-                        "text": (
-                            "User command:\n"
-                            f"{user_text}\n\n"
-                            "Context summary:\n"
-                            f"{json.dumps(ctx_summary, ensure_ascii=True)}\n\n"
-                            "Return only the required JSON object."
-                        )
-                    }
-                ],
-            }
-        ],
-        "generationConfig": {"temperature": 0, "responseMimeType": "application/json"},
-    }
+    url = _gemini_url()
+
+    contents = [
+        {
+            "role": "user",
+            "parts": [
+                {
+                    "text": (
+                        "User command:\n"
+                        f"{user_text}\n\n"
+                        "Context summary:\n"
+                        f"{ctx_summary_json}\n\n"
+                        "Return only the required JSON object."
+                    )
+                }
+            ],
+        }
+    ]
+    body = _STATIC_REQUEST_PREFIX + dumps(contents) + b"}"
 
-    headers = {"Content-Type": "application/json", "X-goog-api-key": api_key}
+    headers = {"X-goog-api-key": api_key}
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        response = _session().post(url, headers=headers, data=body, timeout=30)
     except requests.RequestException as exc:
         raise GeminiAgentError(f"Gemini API network error: {exc}") from exc
 
     if response.status_code >= 400:
-        body = response.text.strip()
-        raise GeminiAgentError(f"Gemini API error ({response.status_code}): {body}")
+        detail = response.text.strip()
+        raise GeminiAgentError(f"Gemini API error ({response.status_code}): {detail}")
 
     try:
-        return response.json()
+        return loads(response.content)
     except json.JSONDecodeError as exc:
         raise GeminiAgentError(f"Gemini API returned invalid JSON: {exc}") from exc
 
 
+def _local_tool_plan(name: str, **args: Any) -> dict[str, Any]:
+    return {"tool_calls": [{"name": name, "args": args}], "needs_clarification": False, "clarification_question": None}
+
+
+def _seconds_arg(number: str, unit: str | None) -> float:
+    value = float(number)
+    if unit and unit.startswith("m"):
+        return value / 1000.0
+    return value
+
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_TIME_UNIT = r" ?(ms|milliseconds?|s|secs?|seconds?)?"
+
+# Fixed-form commands with exactly one reading, keyed by their first word and matched
+# against the whitespace-collapsed, lower-cased command.
+_FAST_PATTERNS: dict[str, tuple[re.Pattern[str], Callable[[re.Match[str]], dict[str, Any]]]] = {
+    **{
+        name: (re.compile(name), lambda m: _local_tool_plan(m.group(0)))
+        for name in ("mute", "unmute", "solo", "unsolo")
+    },
+    "split": (re.compile(r"split at (?:the )?cursor"), lambda m: _local_tool_plan("split_at_cursor")),
+    "trim": (re.compile(r"trim to (?:the )?time selection"), lambda m: _local_tool_plan("trim_to_time_selection")),
+    "fade": (
+        re.compile(rf"fade (in|out) (?:by |over )?{_NUMBER}{_TIME_UNIT}"),
+        lambda m: _local_tool_plan(f"fade_{m.group(1)}", seconds=_seconds_arg(m.group(2), m.group(3))),
+    ),
+    "crossfade": (
+        re.compile(rf"crossfade (?:by |over )?{_NUMBER}{_TIME_UNIT}"),
+        lambda m: _local_tool_plan("crossfade", seconds=_seconds_arg(m.group(1), m.group(2))),
+    ),
+    "set": (
+        re.compile(rf"set (?:the )?volume to {_NUMBER} ?(?:%|percent)"),
+        lambda m: _local_tool_plan("set_volume_set", percent=float(m.group(1))),
+    ),
+    "duplicate": (re.compile(r"duplicate (\d+)(?: times)?"), lambda m: _local_tool_plan("duplicate", count=int(m.group(1)))),
+    "add": (re.compile(r"add (?:an? )?(compressor|eq|reverb)(?: fx)?"), lambda m: _local_tool_plan("add_fx", type=m.group(1))),
+}
+
+
+def _local_plan(command: str, ctx: dict[str, Any]) -> dict[str, Any] | None:
+    # A pending intent means the command answers Gemini's clarification question. A last
+    # intent alone is fine: a full fixed-form command never just fills in a parameter.
+    conversation_hint = ctx.get("conversation_hint")
+    if isinstance(conversation_hint, dict) and conversation_hint.get("pending_intent"):
+        return None
+    normalized = " ".join(command.lower().split())
+    entry = _FAST_PATTERNS.get(normalized.partition(" ")[0])
+    if entry is None:
+        return None
+    pattern, build = entry
+    match = pattern.fullmatch(normalized)
+    if not match:
+        return None
+    plan = build(match)
+    if not has_unambiguous_selection(plan["tool_calls"][0]["name"], ctx):
+        return None
+    valid, _ = validate_tool_plan(plan, ctx)
+    return plan if valid else None
+
+
+_PLAN_CACHE_SIZE = 256
+_PLAN_CACHE: OrderedDict[tuple[str, str], dict[str, Any]] = OrderedDict()
+_PLAN_CACHE_LOCK = threading.Lock()
+_BATCH_MAX_WORKERS = 8
+_BATCH_EXECUTOR: ThreadPoolExecutor | None = None
+_BATCH_EXECUTOR_LOCK = threading.Lock()
+
+
+def _copy_plan(plan: dict[str, Any]) -> dict[str, Any]:
+    # Callers get their own dicts so the cached plan can never be mutated through them.
+    tool_calls = [{"name": call["name"], "args": dict(call["args"])} for call in plan["tool_calls"]]
+    return {**plan, "tool_calls": tool_calls}
+
+
 def plan_tool_calls(user_text: str, ctx: dict[str, Any]) -> dict[str, Any]:
     command = (user_text or "").strip()
     if not command:
         raise GeminiAgentError("Command is empty.")
 
-    api_key = os.getenv("GEMINI_API_KEY")
+    local_plan = _local_plan(command, ctx or {})
+    if local_plan is not None:
+        return local_plan
+
+    api_key = _gemini_api_key()
     if not api_key:
         raise GeminiNotConfiguredError("Gemini is not configured. Set GEMINI_API_KEY in environment or .env.")
 
-    raw_response = _call_gemini(command, build_ctx_summary(ctx or {}), api_key)
-    parsed = _extract_json_text(raw_response)
-    return _enforce_schema(parsed)
+    summary_json = dumps(build_ctx_summary(ctx or {})).decode("utf-8")
+    # Planning runs at temperature 0, so a command and context summary always get the same plan.
+    cache_key = (" ".join(command.split()), summary_json)
+    with _PLAN_CACHE_LOCK:
+        plan = _PLAN_CACHE.get(cache_key)
+        if plan is not None:
+            _PLAN_CACHE.move_to_end(cache_key)
+    if plan is None:
+        raw_response = _call_gemini(command, summary_json, api_key)
+        plan = _enforce_schema(_extract_json_text(raw_response))
+        with _PLAN_CACHE_LOCK:
+            _PLAN_CACHE[cache_key] = plan
+            if len(_PLAN_CACHE) > _PLAN_CACHE_SIZE:
+                _PLAN_CACHE.popitem(last=False)
+    return _copy_plan(plan)
+
+
+def _batch_executor() -> ThreadPoolExecutor:
+    global _BATCH_EXECUTOR
+    with _BATCH_EXECUTOR_LOCK:
+        if _BATCH_EXECUTOR is None:
+            _BATCH_EXECUTOR = ThreadPoolExecutor(max_workers=_BATCH_MAX_WORKERS, thread_name_prefix="gemini-plan")
+        return _BATCH_EXECUTOR
+
+
+def _plan_or_error(user_text: str, ctx: dict[str, Any]) -> dict[str, Any] | Exception:
+    try:
+        return plan_tool_calls(user_text, ctx)
+    except Exception as exc:
+        return exc
+
+
+def plan_tool_calls_batch(user_texts: list[str], ctx: dict[str, Any]) -> list[dict[str, Any] | Exception]:
+    # Results keep input order; a command that failed to plan gets its exception.
+    if len(user_texts) <= 1:
+        return [_plan_or_error(text, ctx) for text in user_texts]
+    return list(_batch_executor().map(lambda text: _plan_or_error(text, ctx), user_texts))
@@ -1,23 +1,35 @@
+import time
+from collections import deque
 from datetime import datetime, timezone
 
 
+def _format_iso(timestamp_ns: int) -> str:
+    seconds, remainder = divmod(timestamp_ns, 1_000_000_000)
+    moment = datetime.fromtimestamp(seconds, tz=timezone.utc).replace(microsecond=remainder // 1000)
+    return moment.isoformat()
+
+
 class CommandHistory:
     def __init__(self, limit=20):
         self.limit = limit
-        self._items = []
+        # Newest first, as (timestamp, timestamp_ns, command, tool_calls) with exactly one
+        # timestamp set: a caller-supplied ISO string or the capture time, formatted in items().
+        self._items = deque(maxlen=limit)
 
     def add(self, cmd: str, tool_calls=None, timestamp=None):
         cmd = (cmd or "").strip()
         if not cmd:
             return
 
-        entry = {
-            "timestamp": timestamp or datetime.now(timezone.utc).isoformat(),
-            "command": cmd,
-            "tool_calls": list(tool_calls or []),
-        }
-        self._items.insert(0, entry)
-        self._items = self._items[: self.limit]
+        timestamp_ns = None if timestamp else time.time_ns()
+        self._items.appendleft((timestamp, timestamp_ns, cmd, list(tool_calls or [])))
 
     def items(self):
-        return list(self._items)
+        return [
+            {
+                "timestamp": timestamp if timestamp_ns is None else _format_iso(timestamp_ns),
+                "command": cmd,
+                "tool_calls": tool_calls,
+            }
+            for timestamp, timestamp_ns, cmd, tool_calls in self._items
+        ]
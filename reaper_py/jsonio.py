@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import importlib
+import json
+from types import ModuleType
+from typing import Any
+
+try:
+    orjson: ModuleType | None = importlib.import_module("orjson")
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def loads(data: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(data: Any) -> bytes:
+    # Non-ASCII stays as UTF-8 in both paths: the Lua JSON decoder has no \u escape support.
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
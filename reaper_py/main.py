@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import sys
+from pathlib import Path
 from typing import Any
 
-from reaper_py.bridge import process_payload
+from reaper_py.bridge import planning_error_response, process_payload
 from reaper_py.contract import execute_tool_calls
+from reaper_py.gemini_agent import plan_tool_calls_batch
 from reaper_py.history import CommandHistory
 
 
@@ -60,36 +63,100 @@ def mock_ctx_time() -> dict[str, Any]:
 
 def _show_ctx(ctx: dict[str, Any]) -> str:
     return (
-        f"clips={len(ctx.get('selected_items') or [])}, "
-        f"tracks={len(ctx.get('selected_tracks') or [])}, "
+        f"clips={len(ctx.get('selected_items') or ())}, "
+        f"tracks={len(ctx.get('selected_tracks') or ())}, "
         f"time_selection={'yes' if ctx.get('time_selection') else 'no'}"
     )
 
 
 def _context_hint(answer: str, ctx: dict[str, Any]) -> str | None:
-    if answer == "tracks" and not (ctx.get("selected_tracks") or []):
+    if answer == "tracks" and not ctx.get("selected_tracks"):
         return "No tracks in this mock context. Use 'select a track' to simulate selection."
-    if answer == "clips" and not (ctx.get("selected_items") or []):
+    if answer == "clips" and not ctx.get("selected_items"):
         return "No clips in this mock context. Use 'select a clip' to simulate selection."
     return None
 
 
+_CONTEXT_COMMANDS = {
+    "select a track": mock_ctx_track,
+    "select a clip": mock_ctx_clip,
+    "select two clips": mock_ctx_two_clips,
+    "select a time range": mock_ctx_time,
+    "clear selection": mock_ctx_none,
+}
+
+
 def _set_context_from_command(command: str) -> dict[str, Any] | None:
-    normalized = " ".join(command.strip().lower().split())
-    if normalized == "select a track":
-        return mock_ctx_track()
-    if normalized == "select a clip":
-        return mock_ctx_clip()
-    if normalized == "select two clips":
-        return mock_ctx_two_clips()
-    if normalized == "select a time range":
-        return mock_ctx_time()
-    if normalized == "clear selection":
-        return mock_ctx_none()
-    return None
+    normalized = " ".join(command.lower().split())
+    factory = _CONTEXT_COMMANDS.get(normalized)
+    return factory() if factory is not None else None
+
 
+def _prefetch_plans(commands: list[str], ctx: dict[str, Any]) -> list[Exception | None]:
+    # Successful plans are left in the planner's cache for process_payload; a failed command
+    # is reported from its error so it is not planned a second time.
+    if len(commands) < 2:
+        return [None] * len(commands)
+    return [result if isinstance(result, Exception) else None for result in plan_tool_calls_batch(commands, ctx)]
+
+
+def run_batch(commands: list[str], ctx: dict[str, Any] | None = None) -> list[tuple[str, dict[str, Any]]]:
+    # Scripted regression runs: plan every command without prompting. Mock selection
+    # commands update the context for the commands that follow them.
+    segments: list[tuple[dict[str, Any], list[str]]] = [(ctx if ctx is not None else mock_ctx_none(), [])]
+    for raw_command in commands:
+        command = raw_command.strip()
+        if not command:
+            continue
+        next_ctx = _set_context_from_command(command)
+        if next_ctx is not None:
+            segments.append((next_ctx, []))
+            continue
+        segments[-1][1].append(command)
+
+    results: list[tuple[str, dict[str, Any]]] = []
+    for segment_ctx, segment_commands in segments:
+        errors = _prefetch_plans(segment_commands, segment_ctx)
+        for command, error in zip(segment_commands, errors):
+            if error is not None:
+                results.append((command, planning_error_response(error)))
+            else:
+                results.append((command, process_payload({"cmd": command, "ctx": segment_ctx})))
+    return results
+
+
+def _main_batch(path: str) -> int:
+    try:
+        commands = Path(path).read_text(encoding="utf-8").splitlines()
+    except (OSError, UnicodeDecodeError) as exc:
+        sys.stderr.write(f"Could not read batch file {path}: {exc}\n")
+        return 1
+
+    lines: list[str] = []
+    status = 0
+    for command, response in run_batch(commands):
+        lines.append(f"> {command}")
+        if not response.get("ok"):
+            lines.append(response.get("error") or "Unknown error.")
+            status = 1
+        elif response.get("needs_clarification"):
+            lines.append(response.get("clarification_question") or "Do you mean clips or tracks?")
+        else:
+            lines.append(response.get("preview") or "")
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+    return status
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    if args:
+        if len(args) == 2 and args[0] == "--batch":
+            return _main_batch(args[1])
+        sys.stderr.write("Usage: python -m reaper_py.main [--batch <commands.txt>]\n")
+        return 1
 
-def main() -> None:
     print("Cursor for DAWs dev harness")
     print("Type natural-language commands, or q to quit.")
     print("Mock selection commands:")
@@ -161,6 +228,8 @@ def main() -> None:
 
         execute_tool_calls(response.get("tool_calls") or [], ctx)
 
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
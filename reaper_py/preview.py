@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import sys
-from typing import Any
+from typing import Any, Callable
 
 if sys.version_info >= (3, 10):
     from typing import TypeGuard
@@ -10,27 +10,35 @@ else:
 
 
 def _is_number(value: Any) -> TypeGuard[int | float]:
-    return isinstance(value, (int, float)) and not isinstance(value, bool)
+    value_type = type(value)
+    return value_type is int or value_type is float
 
 
 def _as_float(value: Any, fallback: float = 0.0) -> float:
+    if type(value) is float:
+        return value
     if _is_number(value):
         return float(value)
     return fallback
 
 
 def _as_int(value: Any, fallback: int = 0) -> int:
-    if isinstance(value, int) and not isinstance(value, bool):
+    if type(value) is int:
         return value
     if _is_number(value):
         return int(value)
     return fallback
 
 
+_MINUTE_PREFIXES = tuple(f"{minute:02d}:" for minute in range(120))
+
+
 def _fmt_time(seconds: float) -> str:
-    minutes = int(seconds // 60)
-    secs = float(seconds) - (60 * minutes)
-    return f"{minutes:02d}:{secs:06.3f}"
+    minutes, secs = divmod(seconds, 60.0)
+    whole_minutes = int(minutes)
+    if 0 <= whole_minutes < len(_MINUTE_PREFIXES):
+        return f"{_MINUTE_PREFIXES[whole_minutes]}{secs:06.3f}"
+    return f"{whole_minutes:02d}:{secs:06.3f}"
 
 
 def _selected_clips(ctx: dict[str, Any]) -> list[dict[str, Any]]:
@@ -55,54 +63,91 @@ def _volume_delta_line(args: dict[str, Any]) -> str:
     return f"{direction} track volume by {abs(percent):.1f}% (gain x {multiplier:.2f})"
 
 
+def _seconds_line(template: str) -> Callable[[dict[str, Any], int, int], str]:
+    return lambda args, clip_count, track_count: template.format(
+        seconds=_as_float(args.get("seconds")), clip_count=clip_count
+    )
+
+
+def _fixed_line(text: str) -> Callable[[dict[str, Any], int, int], str]:
+    return lambda args, clip_count, track_count: text
+
+
+def _r_set_volume_set(args: dict[str, Any], clip_count: int, track_count: int) -> str:
+    percent = _as_float(args.get("percent"))
+    return f"Set track volume to {percent:.1f}% (gain = {percent / 100.0:.2f})"
+
+
+def _r_set_pan(args: dict[str, Any], clip_count: int, track_count: int) -> str:
+    pan = _as_int(args.get("pan"))
+    if pan == 0:
+        return "Set pan to center"
+    direction = "left" if pan < 0 else "right"
+    return f"Set pan to {abs(pan)} {direction}"
+
+
+def _r_add_fx(args: dict[str, Any], clip_count: int, track_count: int) -> str:
+    fx_type = args.get("type")
+    return f"Add {fx_type} FX"
+
+
+def _r_duplicate(args: dict[str, Any], clip_count: int, track_count: int) -> str:
+    count = _as_int(args.get("count"))
+    if clip_count > 0:
+        return f"Duplicate selected clip(s) {count} times"
+    if track_count > 0:
+        return f"Duplicate selected track(s) {count} times"
+    return f"Duplicate selection {count} times"
+
+
+_RENDERERS: dict[str, Callable[[dict[str, Any], int, int], str]] = {
+    "fade_out": _seconds_line("Fade out by {seconds:.1f}s"),
+    "fade_in": _seconds_line("Fade in by {seconds:.1f}s"),
+    "set_volume_delta": lambda args, clip_count, track_count: _volume_delta_line(args),
+    "set_volume_set": _r_set_volume_set,
+    "set_pan": _r_set_pan,
+    "add_fx": _r_add_fx,
+    "mute": _fixed_line("Mute selected track(s)"),
+    "unmute": _fixed_line("Unmute selected track(s)"),
+    "solo": _fixed_line("Solo selected track(s)"),
+    "unsolo": _fixed_line("Unsolo selected track(s)"),
+    "crossfade": _seconds_line("Crossfade {clip_count} selected clips over {seconds:.1f}s"),
+    "cut_middle": _seconds_line("Remove {seconds:.1f}s from middle of selected clip(s)"),
+    "split_at_cursor": _fixed_line("Split selected clip(s) at cursor"),
+    "duplicate": _r_duplicate,
+    "trim_to_time_selection": _fixed_line("Trim selected clip(s) to time selection"),
+}
+
+# Which parts of the selection each tool touches, as bit flags OR-ed across the plan.
+# duplicate is resolved per build_preview call since it follows the current selection.
+_USES_CLIPS, _USES_TRACKS, _USES_TIME_SELECTION = 1, 2, 4
+_TOOL_FLAGS: dict[str | None, int] = {
+    "fade_in": _USES_CLIPS,
+    "fade_out": _USES_CLIPS,
+    "crossfade": _USES_CLIPS,
+    "cut_middle": _USES_CLIPS,
+    "split_at_cursor": _USES_CLIPS | _USES_TIME_SELECTION,
+    "trim_to_time_selection": _USES_CLIPS | _USES_TIME_SELECTION,
+    "set_volume_delta": _USES_TRACKS,
+    "set_volume_set": _USES_TRACKS,
+    "set_pan": _USES_TRACKS,
+    "add_fx": _USES_TRACKS,
+    "mute": _USES_TRACKS,
+    "unmute": _USES_TRACKS,
+    "solo": _USES_TRACKS,
+    "unsolo": _USES_TRACKS,
+}
+
+
 def _render_tool_line(tool_call: dict[str, Any], clip_count: int, track_count: int) -> str:
     name = tool_call.get("name")
     args_raw = tool_call.get("args")
     args = args_raw if isinstance(args_raw, dict) else {}
 
-    if name == "fade_out":
-        return f"Fade out by {_as_float(args.get('seconds')):.1f}s"
-    if name == "fade_in":
-        return f"Fade in by {_as_float(args.get('seconds')):.1f}s"
-    if name == "set_volume_delta":
-        return _volume_delta_line(args)
-    if name == "set_volume_set":
-        percent = _as_float(args.get("percent"))
-        return f"Set track volume to {percent:.1f}% (gain = {percent / 100.0:.2f})"
-    if name == "set_pan":
-        pan = _as_int(args.get("pan"))
-        if pan == 0:
-            return "Set pan to center"
-        direction = "left" if pan < 0 else "right"
-        return f"Set pan to {abs(pan)} {direction}"
-    if name == "add_fx":
-        fx_type = args.get("type")
-        return f"Add {fx_type} FX"
-    if name == "mute":
-        return "Mute selected track(s)"
-    if name == "unmute":
-        return "Unmute selected track(s)"
-    if name == "solo":
-        return "Solo selected track(s)"
-    if name == "unsolo":
-        return "Unsolo selected track(s)"
-    if name == "crossfade":
-        return f"Crossfade {clip_count} selected clips over {_as_float(args.get('seconds')):.1f}s"
-    if name == "cut_middle":
-        return f"Remove {_as_float(args.get('seconds')):.1f}s from middle of selected clip(s)"
-    if name == "split_at_cursor":
-        return "Split selected clip(s) at cursor"
-    if name == "duplicate":
-        count = _as_int(args.get("count"))
-        if clip_count > 0:
-            return f"Duplicate selected clip(s) {count} times"
-        if track_count > 0:
-            return f"Duplicate selected track(s) {count} times"
-        return f"Duplicate selection {count} times"
-    if name == "trim_to_time_selection":
-        return "Trim selected clip(s) to time selection"
-
-    return f"{name} {args}"
+    renderer = _RENDERERS.get(name) if isinstance(name, str) else None
+    if renderer is None:
+        return f"{name} {args}"
+    return renderer(args, clip_count, track_count)
 
 
 def build_preview(tool_calls: list[dict[str, Any]], ctx: dict[str, Any]) -> dict[str, Any]:
@@ -111,54 +156,56 @@ def build_preview(tool_calls: list[dict[str, Any]], ctx: dict[str, Any]) -> dict
     clip_count = len(clips)
     track_count = len(tracks)
 
+    if clip_count > 0:
+        duplicate_flags = _USES_CLIPS
+    elif track_count > 0:
+        duplicate_flags = _USES_TRACKS
+    else:
+        duplicate_flags = 0
+
     bullets: list[str] = []
-    uses_clips = False
-    uses_tracks = False
-    uses_time_selection = False
+    flags = 0
 
     for tool_call in tool_calls:
         name = tool_call.get("name")
         bullets.append(_render_tool_line(tool_call, clip_count, track_count))
+        flags |= duplicate_flags if name == "duplicate" else _TOOL_FLAGS.get(name, 0)
 
-        if name in {"fade_in", "fade_out", "crossfade", "cut_middle", "split_at_cursor", "trim_to_time_selection"}:
-            uses_clips = True
-        if name in {"set_volume_delta", "set_volume_set", "set_pan", "add_fx", "mute", "unmute", "solo", "unsolo"}:
-            uses_tracks = True
-        if name in {"split_at_cursor", "trim_to_time_selection"}:
-            uses_time_selection = True
-        if name == "duplicate":
-            if clip_count > 0:
-                uses_clips = True
-            elif track_count > 0:
-                uses_tracks = True
-
-    if uses_clips:
+    if flags & _USES_CLIPS:
         if clip_count == 1:
             bullets.append("Applied to 1 selected clip")
         elif clip_count > 1:
             bullets.append(f"Applied to {clip_count} selected clips")
 
-        starts: list[float] = []
-        ends: list[float] = []
+        range_start: float | None = None
+        range_end = 0.0
         for clip in clips:
-            if not isinstance(clip, dict):
+            try:
+                start_raw = clip.get("start")
+                end_raw = clip.get("end")
+            except AttributeError:
                 continue
-            start = _as_float(clip.get("start"), fallback=-1.0)
-            end = _as_float(clip.get("end"), fallback=-1.0)
+            start = _as_float(start_raw, fallback=-1.0)
+            end = _as_float(end_raw, fallback=-1.0)
             if start >= 0 and end >= 0:
-                starts.append(start)
-                ends.append(end)
-        if starts and ends:
-            bullets.append(f"Range: {_fmt_time(min(starts))} -> {_fmt_time(max(ends))}")
-
-    if uses_tracks:
+                if range_start is None:
+                    range_start, range_end = start, end
+                else:
+                    if start < range_start:
+                        range_start = start
+                    if end > range_end:
+                        range_end = end
+        if range_start is not None:
+            bullets.append(f"Range: {_fmt_time(range_start)} -> {_fmt_time(range_end)}")
+
+    if flags & _USES_TRACKS:
         if track_count == 1:
             bullets.append("Applied to 1 selected track")
         elif track_count > 1:
             bullets.append(f"Applied to {track_count} selected tracks")
 
     time_selection = ctx.get("time_selection")
-    if uses_time_selection and isinstance(time_selection, dict):
+    if flags & _USES_TIME_SELECTION and isinstance(time_selection, dict):
         start = _as_float(time_selection.get("start"), fallback=-1.0)
         end = _as_float(time_selection.get("end"), fallback=-1.0)
         if end > start:
@@ -169,6 +216,7 @@ def build_preview(tool_calls: list[dict[str, Any]], ctx: dict[str, Any]) -> dict
 
 def render_preview_text(tool_calls: list[dict[str, Any]], ctx: dict[str, Any]) -> str:
     preview = build_preview(tool_calls, ctx)
-    lines = [preview["title"]]
-    lines.extend(f"- {bullet}" for bullet in preview["bullets"])
-    return "\n".join(lines)
+    bullets = preview["bullets"]
+    if not bullets:
+        return preview["title"]
+    return preview["title"] + "\n- " + "\n- ".join(bullets)
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-import json
-import math
+import functools
+import importlib
+import os
 import struct
 import sys
+import tempfile
 import wave
 from pathlib import Path
 
@@ -12,11 +14,136 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from reaper_py.elevenlabs_agent import ElevenLabsError, stt_transcribe, tts_synthesize
+from reaper_py.elevenlabs_agent import ElevenLabsError, stt_transcribe, tts_synthesize_to
+from reaper_py.jsonio import dumps
 
 
 def _write_json(path: Path, payload: dict) -> None:
-    path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    path.write_bytes(dumps(payload))
+
+
+# Samples per block in the numpy analysis path (256 KiB as int32, 512 KiB as float64).
+_ANALYSIS_BLOCK_SAMPLES = 64 * 1024
+
+
+def _silence_limits(sample_width: int) -> tuple[float, float]:
+    # Silence gates in raw sample units: peak below 0.0002 of full scale and RMS below
+    # 0.00005 of full scale, the latter squared so it compares against the mean square.
+    full_scale = (1 << (sample_width * 8 - 1)) - 1
+    return 0.0002 * full_scale, (0.00005 * full_scale) ** 2
+
+
+_SILENCE_LIMITS = {sample_width: _silence_limits(sample_width) for sample_width in (1, 2, 3, 4)}
+
+
+@functools.lru_cache(maxsize=None)
+def _numpy():
+    try:
+        return importlib.import_module("numpy")
+    except ImportError:
+        return None
+
+
+def _decode_samples_numpy(np, frames: bytes, sample_width: int):
+    if sample_width == 1:
+        return np.frombuffer(frames, dtype=np.uint8).astype(np.int16) - 128
+    if sample_width == 3:
+        count = len(frames) // 3
+        raw = np.frombuffer(frames, dtype=np.uint8, count=count * 3).reshape(-1, 3).astype(np.int32)
+        samples = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples -= (samples & 0x800000) << 1
+        return samples
+    dtype = "<i2" if sample_width == 2 else "<i4"
+    return np.frombuffer(frames, dtype=dtype, count=len(frames) // sample_width)
+
+
+def _decode_samples_python(frames: bytes, sample_width: int):
+    if sample_width == 1:
+        return [byte - 128 for byte in frames]
+    if sample_width == 2:
+        count = len(frames) // 2
+        return struct.unpack("<" + ("h" * count), frames[: count * 2])
+    if sample_width == 3:
+        samples_list = []
+        for i in range(0, len(frames) - 2, 3):
+            raw = frames[i] | (frames[i + 1] << 8) | (frames[i + 2] << 16)
+            if raw & 0x800000:
+                raw -= 1 << 24
+            samples_list.append(raw)
+        return samples_list
+    # sample_width == 4
+    count = len(frames) // 4
+    return struct.unpack("<" + ("i" * count), frames[: count * 4])
+
+
+def _peak_and_sum_squares(frames: bytes, sample_width: int) -> tuple[int, float, int] | None:
+    # Returns (peak absolute sample, sum of squared samples, sample count), or None when
+    # there are no samples.
+    np = _numpy()
+    if np is not None:
+        samples = _decode_samples_numpy(np, frames, sample_width)
+        count = samples.size
+        if not count:
+            return None
+        peak = 0
+        sum_squares = 0.0
+        for start in range(0, count, _ANALYSIS_BLOCK_SAMPLES):
+            block = samples[start : start + _ANALYSIS_BLOCK_SAMPLES]
+            # max/min instead of abs(): abs() of the most negative int32 sample overflows.
+            peak = max(peak, int(block.max()), -int(block.min()))
+            as_float = block.astype(np.float64)
+            sum_squares += float(np.dot(as_float, as_float))
+        return peak, sum_squares, count
+
+    samples = _decode_samples_python(frames, sample_width)
+    if not samples:
+        return None
+    peak = 0
+    sum_squares = 0.0
+    for sample in samples:
+        if sample > peak:
+            peak = sample
+        elif -sample > peak:
+            peak = -sample
+        sum_squares += float(sample) * float(sample)
+    return peak, sum_squares, len(samples)
+
+
+def _scan_for_signal(wav: wave.Wave_read, sample_width: int, frame_rate: int) -> tuple[bool, str | None]:
+    chunk_frames = max(1, frame_rate // 5)
+    frames = wav.readframes(chunk_frames)
+    if not frames:
+        return False, "Recorded audio was empty."
+
+    limits = _SILENCE_LIMITS.get(sample_width)
+    if limits is None:
+        return True, None
+    peak_limit, mean_square_limit = limits
+
+    peak = 0
+    sum_squares = 0.0
+    sample_count = 0
+    while frames:
+        try:
+            stats = _peak_and_sum_squares(frames, sample_width)
+        except Exception:
+            return True, None
+        if stats is not None:
+            chunk_peak, chunk_sum_squares, chunk_count = stats
+            peak = max(peak, chunk_peak)
+            sum_squares += chunk_sum_squares
+            sample_count += chunk_count
+            if peak >= peak_limit:
+                return True, None
+        frames = wav.readframes(chunk_frames)
+
+    if not sample_count:
+        return False, "Recorded audio was empty."
+
+    # Skip paid STT call when capture is effectively silent.
+    if sum_squares / sample_count < mean_square_limit:
+        return False, "No speech detected in recording. Check input device and mic permissions."
+    return True, None
 
 
 def _analyze_wav_signal(path: Path) -> tuple[bool, str | None]:
@@ -33,56 +160,13 @@ def _analyze_wav_signal(path: Path) -> tuple[bool, str | None]:
             if duration < 0.25:
                 return False, "Recording was too short. Hold recording a bit longer before stopping."
 
-            frames = wav.readframes(frame_count)
+            return _scan_for_signal(wav, sample_width, frame_rate)
     except wave.Error:
         # If it's not parseable WAV, let the remote STT attempt decide.
         return True, None
     except Exception as exc:
         return False, f"Failed to inspect recorded audio: {exc}"
 
-    if not frames:
-        return False, "Recorded audio was empty."
-
-    max_abs_value = (1 << (sample_width * 8 - 1)) - 1 if sample_width in {1, 2, 3, 4} else None
-    if max_abs_value is None or max_abs_value <= 0:
-        return True, None
-
-    try:
-        if sample_width == 1:
-            samples = [byte - 128 for byte in frames]
-        elif sample_width == 2:
-            count = len(frames) // 2
-            samples = struct.unpack("<" + ("h" * count), frames[: count * 2])
-        elif sample_width == 3:
-            samples_list = []
-            for i in range(0, len(frames) - 2, 3):
-                raw = frames[i] | (frames[i + 1] << 8) | (frames[i + 2] << 16)
-                if raw & 0x800000:
-                    raw -= 1 << 24
-                samples_list.append(raw)
-            samples = samples_list
-        else:  # sample_width == 4
-            count = len(frames) // 4
-            samples = struct.unpack("<" + ("i" * count), frames[: count * 4])
-    except Exception:
-        return True, None
-
-    if not samples:
-        return False, "Recorded audio was empty."
-
-    abs_samples = [abs(int(sample)) for sample in samples]
-    peak = max(abs_samples)
-    mean_square = sum(float(sample) * float(sample) for sample in samples) / float(len(samples))
-    rms = math.sqrt(mean_square)
-
-    peak_ratio = peak / float(max_abs_value)
-    rms_ratio = rms / float(max_abs_value)
-
-    # Skip paid STT call when capture is effectively silent.
-    if peak_ratio < 0.0002 and rms_ratio < 0.00005:
-        return False, "No speech detected in recording. Check input device and mic permissions."
-    return True, None
-
 
 def _stt(input_wav: Path, output_json: Path) -> int:
     if not input_wav.exists():
@@ -107,6 +191,18 @@ def _stt(input_wav: Path, output_json: Path) -> int:
     return 0
 
 
+def _default_file_mode() -> int:
+    # NamedTemporaryFile creates files as 0600; give the output the mode open() would have.
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _discard(path: Path | None) -> None:
+    if path is not None:
+        path.unlink(missing_ok=True)
+
+
 def _tts(input_text_file: Path, output_mp3_path: Path, voice_id: str | None) -> int:
     if not input_text_file.exists():
         sys.stderr.write(f"Input text file not found: {input_text_file}\n")
@@ -117,16 +213,26 @@ def _tts(input_text_file: Path, output_mp3_path: Path, voice_id: str | None) ->
         sys.stderr.write("Input text file is empty.\n")
         return 1
 
+    # Stream into a sibling temp file and move it into place only once the audio is complete,
+    # so a failed request never truncates or removes an existing file at the output path.
+    temp_path: Path | None = None
     try:
-        audio = tts_synthesize(text, voice_id=voice_id)
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=output_mp3_path.parent, prefix=f".{output_mp3_path.name}.", suffix=".part", delete=False
+        ) as audio_file:
+            temp_path = Path(audio_file.name)
+            tts_synthesize_to(text, audio_file, voice_id=voice_id)
+        os.chmod(temp_path, _default_file_mode())
+        os.replace(temp_path, output_mp3_path)
     except (ElevenLabsError, RuntimeError) as exc:
+        _discard(temp_path)
         sys.stderr.write(f"TTS error: {exc}\n")
         return 1
     except Exception as exc:
+        _discard(temp_path)
         sys.stderr.write(f"Unexpected TTS error: {exc}\n")
         return 1
 
-    output_mp3_path.write_bytes(audio)
     return 0
 
 
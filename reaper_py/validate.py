@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import sys
-from typing import Any
+from typing import Any, Callable
 
 if sys.version_info >= (3, 10):
     from typing import TypeGuard
@@ -9,7 +9,7 @@ else:
     from typing_extensions import TypeGuard
 
 
-WHITELISTED_TOOLS = {
+WHITELISTED_TOOLS = frozenset({
     "fade_out",
     "fade_in",
     "set_volume_delta",
@@ -25,14 +25,34 @@ WHITELISTED_TOOLS = {
     "split_at_cursor",
     "duplicate",
     "trim_to_time_selection",
+})
+
+FX_TYPES = frozenset({"compressor", "eq", "reverb"})
+NO_ARG_TOOLS = frozenset({"mute", "unmute", "solo", "unsolo", "split_at_cursor", "trim_to_time_selection"})
+
+_PLAN_KEYS = frozenset({"tool_calls", "needs_clarification", "clarification_question"})
+_CALL_KEYS = frozenset({"name", "args"})
+_DB_KEYS = frozenset({"db"})
+_PERCENT_KEYS = frozenset({"percent"})
+_TYPE_KEYS = frozenset({"type"})
+
+# Tools whose args are a single bounded number, checked by one shared routine:
+# name -> (arg key, integer only, low, low inclusive, high or None, range text for errors).
+_SCALAR_ARG_SPECS: dict[str, tuple[str, bool, float, bool, float | None, str]] = {
+    "fade_in": ("seconds", False, 0, False, 30, "> 0 and <= 30"),
+    "fade_out": ("seconds", False, 0, False, 30, "> 0 and <= 30"),
+    "crossfade": ("seconds", False, 0, False, 10, "> 0 and <= 10"),
+    "cut_middle": ("seconds", False, 0, False, None, "> 0"),
+    "set_volume_set": ("percent", False, 0, True, 200, "between 0 and 200"),
+    "set_pan": ("pan", True, -100, True, 100, "between -100 and 100"),
+    "duplicate": ("count", True, 1, True, 32, "between 1 and 32"),
 }
 
-FX_TYPES = {"compressor", "eq", "reverb"}
-NO_ARG_TOOLS = {"mute", "unmute", "solo", "unsolo", "split_at_cursor", "trim_to_time_selection"}
-
 
 def _is_number(value: Any) -> TypeGuard[int | float]:
-    return isinstance(value, (int, float)) and not isinstance(value, bool)
+    # Parsed JSON only yields exact int/float, and type(True) is bool, so this excludes bools.
+    value_type = type(value)
+    return value_type is int or value_type is float
 
 
 def _selected_items(ctx: dict[str, Any]) -> list[dict[str, Any]]:
@@ -57,8 +77,7 @@ def _has_time_selection(ctx: dict[str, Any]) -> bool:
 
 
 def _validate_plan_shape(plan: dict[str, Any]) -> tuple[bool, str | None]:
-    required_keys = {"tool_calls", "needs_clarification", "clarification_question"}
-    if set(plan.keys()) != required_keys:
+    if plan.keys() != _PLAN_KEYS:
         return False, "Invalid plan: keys must be exactly tool_calls, needs_clarification, clarification_question."
 
     if not isinstance(plan.get("tool_calls"), list):
@@ -89,7 +108,7 @@ def _validate_set_volume_delta(args: dict[str, Any]) -> tuple[bool, str | None]:
         return False, "Invalid args for set_volume_delta: provide exactly one of db or percent."
 
     if has_db:
-        if set(args.keys()) != {"db"}:
+        if args.keys() != _DB_KEYS:
             return False, "Invalid args for set_volume_delta: only db is allowed in dB mode."
         db = args.get("db")
         if not _is_number(db):
@@ -98,7 +117,7 @@ def _validate_set_volume_delta(args: dict[str, Any]) -> tuple[bool, str | None]:
             return False, "Invalid args for set_volume_delta: db must be between -24 and 24."
         return True, None
 
-    if set(args.keys()) != {"percent"}:
+    if args.keys() != _PERCENT_KEYS:
         return False, "Invalid args for set_volume_delta: only percent is allowed in percent mode."
     percent = args.get("percent")
     if not _is_number(percent):
@@ -108,17 +127,102 @@ def _validate_set_volume_delta(args: dict[str, Any]) -> tuple[bool, str | None]:
     return True, None
 
 
-def _validate_set_volume_set(args: dict[str, Any]) -> tuple[bool, str | None]:
-    if set(args.keys()) != {"percent"}:
-        return False, "Invalid args for set_volume_set: expected only percent."
-    percent = args.get("percent")
-    if not _is_number(percent):
-        return False, "Invalid args for set_volume_set: percent must be numeric."
-    if not (0 <= float(percent) <= 200):
-        return False, "Invalid args for set_volume_set: percent must be between 0 and 200."
+def _validate_scalar_arg(name: str, args: dict[str, Any]) -> str | None:
+    key, integer_only, low, low_inclusive, high, range_text = _SCALAR_ARG_SPECS[name]
+    if len(args) != 1 or key not in args:
+        return f"Invalid args for {name}: expected only {key}."
+    value = args[key]
+    if integer_only:
+        if type(value) is not int:
+            return f"Invalid args for {name}: {key} must be an integer."
+    elif not _is_number(value):
+        return f"Invalid args for {name}: {key} must be numeric."
+    above_low = value >= low if low_inclusive else value > low
+    if not above_low or (high is not None and value > high):
+        return f"Invalid args for {name}: {key} must be {range_text}."
+    return None
+
+
+def _validate_add_fx(args: dict[str, Any]) -> tuple[bool, str | None]:
+    if args.keys() != _TYPE_KEYS:
+        return False, "Invalid args for add_fx: expected only type."
+    fx_type = args.get("type")
+    if not isinstance(fx_type, str):
+        return False, "Invalid args for add_fx: type must be a string."
+    if fx_type not in FX_TYPES:
+        return False, f"Invalid args for add_fx: type must be one of {sorted(FX_TYPES)}."
     return True, None
 
 
+_NEEDS_CLIP = "clip"
+_NEEDS_TRACK = "track"
+_NEEDS_TWO_CLIPS = "two_clips"
+_NEEDS_CLIP_OR_TRACK = "clip_or_track"
+_NEEDS_CLIP_XOR_TRACK = "clip_xor_track"
+_NEEDS_CLIP_OR_TIME = "clip_or_time"
+_NEEDS_CLIP_AND_TIME = "clip_and_time"
+
+_SELECTION_ERRORS = {
+    _NEEDS_CLIP: "{name} requires at least 1 selected clip.",
+    _NEEDS_TRACK: "{name} requires at least 1 selected track.",
+    _NEEDS_TWO_CLIPS: "{name} requires exactly 2 selected clips.",
+    _NEEDS_CLIP_OR_TRACK: "{name} requires selected clip(s) or selected track(s).",
+}
+
+# name -> (extra arg validator or None, selection requirement or None). Tools without a
+# requirement are left to cursor.lua, which treats an empty selection as a no-op for them.
+_TOOL_RULES: dict[str, tuple[Callable[[dict[str, Any]], tuple[bool, str | None]] | None, str | None]] = {
+    "fade_out": (None, _NEEDS_CLIP),
+    "fade_in": (None, _NEEDS_CLIP),
+    "set_volume_delta": (_validate_set_volume_delta, _NEEDS_TRACK),
+    "set_volume_set": (None, _NEEDS_TRACK),
+    "set_pan": (None, _NEEDS_TRACK),
+    "add_fx": (_validate_add_fx, _NEEDS_TRACK),
+    "mute": (None, None),
+    "unmute": (None, None),
+    "solo": (None, None),
+    "unsolo": (None, None),
+    "crossfade": (None, _NEEDS_TWO_CLIPS),
+    "cut_middle": (None, _NEEDS_CLIP),
+    "split_at_cursor": (None, None),
+    "duplicate": (None, _NEEDS_CLIP_OR_TRACK),
+    "trim_to_time_selection": (None, None),
+}
+
+# Stricter requirements for plans built without Gemini: the target must be unambiguous,
+# otherwise the command goes to Gemini, which can ask which clips or tracks were meant.
+_UNAMBIGUOUS_SELECTION: dict[str, str | None] = {
+    **{name: requirement for name, (_, requirement) in _TOOL_RULES.items()},
+    "mute": _NEEDS_TRACK,
+    "unmute": _NEEDS_TRACK,
+    "solo": _NEEDS_TRACK,
+    "unsolo": _NEEDS_TRACK,
+    "split_at_cursor": _NEEDS_CLIP_OR_TIME,
+    "duplicate": _NEEDS_CLIP_XOR_TRACK,
+    "trim_to_time_selection": _NEEDS_CLIP_AND_TIME,
+}
+
+
+def _selection_state(ctx: dict[str, Any]) -> dict[str, bool]:
+    item_count = len(_selected_items(ctx))
+    track_count = len(_selected_tracks(ctx))
+    has_time = _has_time_selection(ctx)
+    return {
+        _NEEDS_CLIP: item_count >= 1,
+        _NEEDS_TRACK: track_count >= 1,
+        _NEEDS_TWO_CLIPS: item_count == 2,
+        _NEEDS_CLIP_OR_TRACK: item_count >= 1 or track_count >= 1,
+        _NEEDS_CLIP_XOR_TRACK: (item_count >= 1) != (track_count >= 1),
+        _NEEDS_CLIP_OR_TIME: item_count >= 1 or has_time,
+        _NEEDS_CLIP_AND_TIME: item_count >= 1 and has_time,
+    }
+
+
+def has_unambiguous_selection(name: str, ctx: dict[str, Any]) -> bool:
+    requirement = _UNAMBIGUOUS_SELECTION.get(name)
+    return requirement is None or _selection_state(ctx)[requirement]
+
+
 def validate_tool_plan(plan: dict[str, Any], ctx: dict[str, Any]) -> tuple[bool, str | None]:
     if not isinstance(plan, dict):
         return False, "Invalid plan: expected object."
@@ -131,120 +235,36 @@ def validate_tool_plan(plan: dict[str, Any], ctx: dict[str, Any]) -> tuple[bool,
     if plan["needs_clarification"]:
         return True, None
 
-    item_count = len(_selected_items(ctx))
-    track_count = len(_selected_tracks(ctx))
-    has_time_selection = _has_time_selection(ctx)
+    satisfied = _selection_state(ctx)
 
     for index, tool_call in enumerate(plan["tool_calls"]):
         if not isinstance(tool_call, dict):
             return False, f"Invalid tool call at index {index}: expected object."
-        if set(tool_call.keys()) != {"name", "args"}:
+        if tool_call.keys() != _CALL_KEYS:
             return False, f"Invalid tool call at index {index}: keys must be exactly name and args."
 
         name = tool_call.get("name")
         args = tool_call.get("args")
-        if not isinstance(name, str) or name not in WHITELISTED_TOOLS:
+        rules = _TOOL_RULES.get(name) if isinstance(name, str) else None
+        if rules is None:
             return False, f"Unsupported tool: {name!r}."
         if not isinstance(args, dict):
             return False, f"Invalid args for {name}: expected object."
 
-        if name in NO_ARG_TOOLS:
-            if args:
-                return False, f"Invalid args for {name}: expected no args."
-
-        elif name in {"fade_in", "fade_out"}:
-            if set(args.keys()) != {"seconds"}:
-                return False, f"Invalid args for {name}: expected only seconds."
-            seconds = args.get("seconds")
-            if not _is_number(seconds):
-                return False, f"Invalid args for {name}: seconds must be numeric."
-            if not (0 < float(seconds) <= 30):
-                return False, f"Invalid args for {name}: seconds must be > 0 and <= 30."
-            if item_count < 1:
-                return False, f"{name} requires at least 1 selected clip."
-
-        elif name == "set_volume_delta":
-            valid, err = _validate_set_volume_delta(args)
-            if not valid:
-                return False, err
-            if track_count < 1:
-                return False, "set_volume_delta requires at least 1 selected track."
+        if name in _SCALAR_ARG_SPECS:
+            arg_error = _validate_scalar_arg(name, args)
+            if arg_error is not None:
+                return False, arg_error
+        elif name in NO_ARG_TOOLS and args:
+            return False, f"Invalid args for {name}: expected no args."
 
-        elif name == "set_volume_set":
-            valid, err = _validate_set_volume_set(args)
+        validate_args, requirement = rules
+        if validate_args is not None:
+            valid, err = validate_args(args)
             if not valid:
                 return False, err
-            if track_count < 1:
-                return False, "set_volume_set requires at least 1 selected track."
-
-        elif name == "set_pan":
-            if set(args.keys()) != {"pan"}:
-                return False, "Invalid args for set_pan: expected only pan."
-            pan = args.get("pan")
-            if not isinstance(pan, int) or isinstance(pan, bool):
-                return False, "Invalid args for set_pan: pan must be an integer."
-            if not (-100 <= pan <= 100):
-                return False, "Invalid args for set_pan: pan must be between -100 and 100."
-            if track_count < 1:
-                return False, "set_pan requires at least 1 selected track."
-
-        elif name == "add_fx":
-            if set(args.keys()) != {"type"}:
-                return False, "Invalid args for add_fx: expected only type."
-            fx_type = args.get("type")
-            if not isinstance(fx_type, str):
-                return False, "Invalid args for add_fx: type must be a string."
-            if fx_type not in FX_TYPES:
-                return False, f"Invalid args for add_fx: type must be one of {sorted(FX_TYPES)}."
-            if track_count < 1:
-                return False, "add_fx requires at least 1 selected track."
-
-        elif name in {"mute", "unmute", "solo", "unsolo"}:
-            if track_count < 1:
-                return False, f"{name} requires at least 1 selected track."
-
-        elif name == "crossfade":
-            if set(args.keys()) != {"seconds"}:
-                return False, "Invalid args for crossfade: expected only seconds."
-            seconds = args.get("seconds")
-            if not _is_number(seconds):
-                return False, "Invalid args for crossfade: seconds must be numeric."
-            if not (0 < float(seconds) <= 10):
-                return False, "Invalid args for crossfade: seconds must be > 0 and <= 10."
-            if item_count != 2:
-                return False, "crossfade requires exactly 2 selected clips."
-
-        elif name == "cut_middle":
-            if set(args.keys()) != {"seconds"}:
-                return False, "Invalid args for cut_middle: expected only seconds."
-            seconds = args.get("seconds")
-            if not _is_number(seconds):
-                return False, "Invalid args for cut_middle: seconds must be numeric."
-            if not (float(seconds) > 0):
-                return False, "Invalid args for cut_middle: seconds must be > 0."
-            if item_count < 1:
-                return False, "cut_middle requires at least 1 selected clip."
-
-        elif name == "split_at_cursor":
-            if item_count < 1 and not has_time_selection:
-                return False, "split_at_cursor requires selected clip(s) or a time selection."
-
-        elif name == "duplicate":
-            if set(args.keys()) != {"count"}:
-                return False, "Invalid args for duplicate: expected only count."
-            count = args.get("count")
-            if not isinstance(count, int) or isinstance(count, bool):
-                return False, "Invalid args for duplicate: count must be an integer."
-            if not (1 <= count <= 32):
-                return False, "Invalid args for duplicate: count must be between 1 and 32."
-            if item_count < 1 and track_count < 1:
-                return False, "duplicate requires selected clip(s) or selected track(s)."
-
-        elif name == "trim_to_time_selection":
-            if not has_time_selection:
-                return False, "trim_to_time_selection requires an active time selection."
-            if item_count < 1:
-                return False, "trim_to_time_selection requires at least 1 selected clip."
+        if requirement is not None and not satisfied[requirement]:
+            return False, _SELECTION_ERRORS[requirement].format(name=name)
 
     return True, None
 
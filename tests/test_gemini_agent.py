@@ -0,0 +1,42 @@
+import unittest
+from unittest import mock
+
+from reaper_py import gemini_agent
+
+TRACK = {"name": "Track 1", "index": 1}
+CLIP = {"start": 42.1, "end": 45.1, "length": 3.0}
+
+
+def _panel_ctx(**overrides):
+    ctx = {
+        "selected_items": [],
+        "selected_tracks": [TRACK],
+        "time_selection": None,
+        "cursor": 42.0,
+        "conversation_hint": {"last_intent": "fade out selected clips"},
+    }
+    ctx.update(overrides)
+    return ctx
+
+
+class LocalPlanTests(unittest.TestCase):
+    def test_last_intent_still_takes_local_path(self):
+        gemini_agent.refresh_config()
+        with mock.patch.dict("os.environ", {"GEMINI_API_KEY": ""}), mock.patch.object(
+            gemini_agent, "_call_gemini", side_effect=AssertionError("Gemini was called")
+        ):
+            plan = gemini_agent.plan_tool_calls("mute", _panel_ctx())
+        self.assertEqual(plan["tool_calls"], [{"name": "mute", "args": {}}])
+
+    def test_pending_intent_goes_to_gemini(self):
+        ctx = _panel_ctx(conversation_hint={"pending_intent": "fade out"})
+        self.assertIsNone(gemini_agent._local_plan("mute", ctx))
+
+    def test_duplicate_with_clips_and_tracks_goes_to_gemini(self):
+        self.assertIsNone(gemini_agent._local_plan("duplicate 2", _panel_ctx(selected_items=[CLIP])))
+        plan = gemini_agent._local_plan("duplicate 2", _panel_ctx())
+        self.assertEqual(plan["tool_calls"], [{"name": "duplicate", "args": {"count": 2}}])
+
+
+if __name__ == "__main__":
+    unittest.main()